@@ -7,12 +7,35 @@ from motor.motor_asyncio import AsyncIOMotorCollection
 from pymongo import ReturnDocument
 
 from pydantic import BaseModel
+from collections import OrderedDict
 from typing import Optional, List
-from uuid import uuid4
+from uuid import UUID, uuid4
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Number of ToDoList documents kept in the in-process read cache
+LIST_CACHE_SIZE = 256
+
+
+def _item_id_match(item_id: UUID) -> dict:
+   # items are stored with binary UUID ids; older items used uuid4().hex strings
+   return {"$in": [item_id, item_id.hex]}
+
+
+def _bump_version_if_item(item_id: UUID) -> dict:
+   """
+   Aggregation expression for the new "_v": incremented only when the list
+   holds the item, so a miss leaves cached copies valid.
+   """
+   has_item = {
+      "$gt": [
+         {"$size": {"$setIntersection": [{"$ifNull": ["$items.id", []]}, [item_id, item_id.hex]]}},
+         0,
+      ]
+   }
+   return {"$add": [{"$ifNull": ["$_v", 0]}, {"$cond": [has_item, 1, 0]}]}
+
 class ListSummary(BaseModel):
    id: Optional[str] = None
    name: str = ""
@@ -21,7 +44,7 @@ class ListSummary(BaseModel):
    @staticmethod
    def from_doc(doc) -> "ListSummary":
       if not doc:
-         return ListSummary(id=None, name="", item_count=0)
+         return ListSummary.model_construct(id=None, name="", item_count=0)
       # doc["_id"] may be ObjectId
       raw_id = doc.get("_id") or doc.get("id")
       try:
@@ -29,14 +52,14 @@ class ListSummary(BaseModel):
       except Exception:
          id_str = None
 
-      # if items present, compute count defensively
-      items = doc.get("items", [])
+      # item_count is computed server-side by the $size projection
       try:
-         count = len(items)
+         count = int(doc.get("item_count", 0))
       except Exception:
          count = 0
 
-      return ListSummary(
+      # data comes from our own collection, so skip validation
+      return ListSummary.model_construct(
          id=id_str,
          name=doc.get("name", ""),
          item_count=count,
@@ -55,7 +78,7 @@ class ToDoListItem(BaseModel):
       Uses .get to avoid KeyError.
       """
       if not item or not isinstance(item, dict):
-         return ToDoListItem(id=None, label="", checked=False)
+         return ToDoListItem.model_construct(id=None, label="", checked=False)
 
       raw_id = item.get("id") if item.get("id") is not None else item.get("_id")
       try:
@@ -63,11 +86,14 @@ class ToDoListItem(BaseModel):
       except Exception:
          id_str = None
 
-      return ToDoListItem(
+      return ToDoListItem.model_construct(
          id=id_str,
          label=item.get("label", ""),
          checked=bool(item.get("checked", False)),
       )
+
+# bound once at import; used in the hot loop of ToDoList.from_doc
+_construct_item = ToDoListItem.model_construct
    
 class ToDoList(BaseModel):
    id: Optional[str] = None
@@ -84,15 +110,28 @@ class ToDoList(BaseModel):
       except Exception:
          id_str = None
 
-      items_docs = doc.get("items", []) or []
-      items_list = []
-      for item in items_docs:
-         try:
-            items_list.append(ToDoListItem.from_doc(item))
-         except Exception as e:
-            logger.warning("Skipping bad item while mapping ToDoList items: %s", e)
+      items_docs = doc.get("items")
+      if not isinstance(items_docs, list):
+         if items_docs:
+            logger.warning("Ignoring non-list items field on list %s", id_str)
+         items_docs = []
 
-      return ToDoList(
+      # inlined ToDoListItem.from_doc; non-dict entries are skipped
+      items_list = [
+         _construct_item(
+            # same fallback as ToDoListItem.from_doc: use _id when id is missing or None
+            id=None if (
+               raw := (item.get("id") if item.get("id") is not None else item.get("_id"))
+            ) is None else str(raw),
+            label=item.get("label", ""),
+            checked=bool(item.get("checked", False)),
+         )
+         for item in items_docs
+         if isinstance(item, dict)
+      ]
+
+      # items are already ToDoListItem instances; skip re-validation
+      return ToDoList.model_construct(
          id=id_str,
          name=doc.get("name", ""),
          items=items_list,
@@ -101,65 +140,110 @@ class ToDoList(BaseModel):
 class ToDoDAL:
    def __init__(self, todo_collection: AsyncIOMotorCollection):
       self._todo_collection = todo_collection
+      # list id -> (version, ToDoList); every write bumps the stored "_v"
+      self._list_cache: "OrderedDict[ObjectId, tuple[int, ToDoList]]" = OrderedDict()
+
+   def _cache_put(self, id: ObjectId, entry: tuple[int, ToDoList]) -> None:
+      cached = self._list_cache.get(id)
+      # a slower concurrent read must not replace a newer version
+      if cached is not None and cached[0] > entry[0]:
+         return
+      self._list_cache[id] = entry
+      self._list_cache.move_to_end(id)
+      if len(self._list_cache) > LIST_CACHE_SIZE:
+         self._list_cache.popitem(last=False)
 
-   async def list_todo_lists(self, session=None):
-      # Use find to get name and items (items used to compute count)
-      async for doc in self._todo_collection.find(
-         {},
-         projection={"name": 1, "items": 1},
-         sort=[("name", 1)],
+   def _cache_invalidate(self, id: ObjectId) -> None:
+      self._list_cache.pop(id, None)
+
+   async def list_todo_lists(self, session=None) -> List[ListSummary]:
+      # Let MongoDB compute the item count so the items arrays never leave the server
+      docs = await self._todo_collection.aggregate(
+         [
+            # sort first so the planner can walk the name index
+            {"$sort": {"name": 1}},
+            {
+               "$project": {
+                  "name": 1,
+                  "item_count": {"$size": {"$ifNull": ["$items", []]}},
+               }
+            },
+         ],
          session=session,
-      ):
-         yield ListSummary.from_doc(doc)
+      ).to_list(length=None)
+      return [ListSummary.from_doc(doc) for doc in docs]
 
    async def create_todo_list(self, name: str, session=None) -> str:
       response = await self._todo_collection.insert_one(
-         {"name": name, "items": []}, 
+         {"name": name, "items": [], "_v": 0}, 
          session=session
       )
       return str(response.inserted_id)
    
-   async def get_todo_list(self, id: str, session=None) -> Optional[ToDoList]:
-      try:
-         doc = await self._todo_collection.find_one(
-            {"_id": ObjectId(id)},
-            session=session,
-         )
-      except Exception:
-         # If id is not a valid ObjectId, try as string id field
-         doc = await self._todo_collection.find_one({"_id": id}, session=session)
+   async def get_todo_list_version(self, id: ObjectId, session=None) -> Optional[int]:
+      """
+      Read only the version ("_v") of a list; None if the list is missing.
+      """
+      doc = await self._todo_collection.find_one(
+         {"_id": id},
+         projection={"_v": 1},
+         session=session,
+      )
+      if not doc:
+         self._cache_invalidate(id)
+         return None
+      return doc.get("_v", 0)
 
+   async def get_todo_list_versioned(
+         self,
+         id: ObjectId,
+         version: Optional[int] = None,
+         session=None,
+   ) -> Optional[tuple[int, ToDoList]]:
+      """
+      Fetch a list together with its version ("_v"), serving repeat reads
+      from an LRU cache. A cache hit is revalidated by reading only "_v",
+      so writes made by other workers are still seen; pass `version` when
+      the caller has just read it to skip that query.
+      """
+      cached = self._list_cache.get(id)
+      if cached is not None:
+         if version is None:
+            version = await self.get_todo_list_version(id, session=session)
+            if version is None:
+               return None
+         if version == cached[0]:
+            self._cache_put(id, cached)
+            return cached
+
+      doc = await self._todo_collection.find_one({"_id": id}, session=session)
       if not doc:
+         self._cache_invalidate(id)
          return None
-      return ToDoList.from_doc(doc)
+      entry = (doc.get("_v", 0), ToDoList.from_doc(doc))
+      self._cache_put(id, entry)
+      return entry
    
-   async def delete_todo_list(self, id: str, session=None) -> bool:
-      # remove the list by ObjectId if possible, else by string id
-      try:
-         response = await self._todo_collection.delete_one(
-            {"_id": ObjectId(id)},
-            session=session,
-         )
-      except Exception:
-         response = await self._todo_collection.delete_one(
-            {"_id": id},
-            session=session,
-         )
+   async def delete_todo_list(self, id: ObjectId, session=None) -> bool:
+      response = await self._todo_collection.delete_one({"_id": id}, session=session)
+      self._cache_invalidate(id)
       return response.deleted_count == 1
    
    async def create_item(
          self,
-         id: str | ObjectId,
+         id: ObjectId,
          label: str,
          session=None,
-   ) -> Optional[ToDoList]:
+   ) -> Optional[ToDoListItem]:
       """
-      Adds a new item to items[] using a string 'id' field for the item.
-      We standardize on items having {'id': '<hex>', 'label':..., 'checked':...}
+      Adds a new item to items[] using a binary UUID 'id' field for the item.
+      We standardize on items having {'id': UUID, 'label':..., 'checked':...}
+      Returns only the new item; the rest of the list is not read back.
       """
-      item_id = uuid4().hex
-      result = await self._todo_collection.find_one_and_update(
-         {"_id": ObjectId(id) if not isinstance(id, str) or ObjectId.is_valid(id) else id},
+      item_id = uuid4()
+      # plain update: nothing is read back, not even the _id
+      result = await self._todo_collection.update_one(
+         {"_id": id},
          {
             "$push": {
                "items": {
@@ -167,60 +251,95 @@ class ToDoDAL:
                   "label": label,
                   "checked": False,
                }
-            }
+            },
+            "$inc": {"_v": 1},
          },
          session=session,
-         return_document=ReturnDocument.AFTER,
       )
-      if result:
-         return ToDoList.from_doc(result)
+      self._cache_invalidate(id)
+      if result.matched_count == 1:
+         return ToDoListItem.model_construct(id=str(item_id), label=label, checked=False)
       return None
    
    async def set_checked_state(
          self,
-         doc_id: str | ObjectId,
-         item_id: str,
+         doc_id: ObjectId,
+         item_id: UUID,
          checked_state: bool,
          session=None,
-   ) -> Optional[ToDoList]:
+   ) -> tuple[bool, Optional[ToDoListItem]]:
       """
-      Update checked state of an item; query uses items.id (string).
+      Update checked state of an item with a single pipeline update.
+      Returns (list_found, item): item is the updated ToDoListItem, or None
+      when the list exists but has no such item.
       """
-      # try ObjectId for doc_id if possible
-      filter_doc = {"_id": ObjectId(doc_id)} if ObjectId.is_valid(str(doc_id)) else {"_id": doc_id}
-      # include items.id in filter
-      filter_doc["items.id"] = item_id
-
+      is_item = {"$in": ["$$it.id", [item_id, item_id.hex]]}
       result = await self._todo_collection.find_one_and_update(
-         filter_doc,
-         {"$set": {"items.$.checked": checked_state}},
+         {"_id": doc_id},
+         [
+            {
+               "$set": {
+                  "items": {
+                     "$map": {
+                        "input": {"$ifNull": ["$items", []]},
+                        "as": "it",
+                        "in": {
+                           "$cond": [
+                              is_item,
+                              {"$mergeObjects": ["$$it", {"checked": checked_state}]},
+                              "$$it",
+                           ]
+                        },
+                     }
+                  },
+                  "_v": _bump_version_if_item(item_id),
+               }
+            }
+         ],
+         projection={"_id": 0, "items": {"$elemMatch": {"id": _item_id_match(item_id)}}},
          session=session,
          return_document=ReturnDocument.AFTER,
       )
-      if result:
-         return ToDoList.from_doc(result)
-      return None
+      if result is None:
+         return False, None
+      if not result.get("items"):
+         return True, None
+      self._cache_invalidate(doc_id)
+      return True, ToDoListItem.from_doc(result["items"][0])
       
    async def delete_item(
          self,
-         doc_id: str | ObjectId,
-         item_id: str,
+         doc_id: ObjectId,
+         item_id: UUID,
          session=None,
-   ) -> Optional[ToDoList]:
+   ) -> tuple[bool, bool]:
       """
-      Remove item from list (use $pull on items by 'id')
+      Remove item from list with a single pipeline update.
+      Returns (list_found, item_removed); the pre-update document is
+      projected down to the matching item to tell whether it existed.
       """
-      try:
-         filter_doc = {"_id": ObjectId(doc_id)}
-      except Exception:
-         filter_doc = {"_id": doc_id}
-
       result = await self._todo_collection.find_one_and_update(
-         filter_doc,
-         {"$pull": {"items": {"id": item_id}}},
+         {"_id": doc_id},
+         [
+            {
+               "$set": {
+                  "items": {
+                     "$filter": {
+                        "input": {"$ifNull": ["$items", []]},
+                        "cond": {"$not": [{"$in": ["$$this.id", [item_id, item_id.hex]]}]},
+                     }
+                  },
+                  "_v": _bump_version_if_item(item_id),
+               }
+            }
+         ],
+         projection={"_id": 0, "items": {"$elemMatch": {"id": _item_id_match(item_id)}}},
          session=session,
-         return_document=ReturnDocument.AFTER,
+         return_document=ReturnDocument.BEFORE,
       )
-      if result:
-         return ToDoList.from_doc(result)
-      return None
+      if result is None:
+         return False, False
+      if not result.get("items"):
+         return True, False
+      self._cache_invalidate(doc_id)
+      return True, True
@@ -1,17 +1,20 @@
 # server.py (patched)
+import asyncio
 from contextlib import asynccontextmanager
-from datetime import datetime
+from datetime import datetime, timezone
 import os
 import sys
 import logging
+from uuid import UUID
 
 from bson import ObjectId
-from fastapi import FastAPI, HTTPException, Request, status
+from fastapi import FastAPI, HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse
 from motor.motor_asyncio import AsyncIOMotorClient
 from pydantic import BaseModel
 import uvicorn
 
-from dal import ToDoDAL, ToDoList, ListSummary
+from dal import ToDoDAL, ToDoList, ToDoListItem, ListSummary
 
 logger = logging.getLogger("todo_app")
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
@@ -19,20 +22,55 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name
 COLLECTION_NAME = "todo_lists"
 MONGODB_URI = os.environ["MONGODB_URI"]
 DEBUG = os.environ.get("DEBUG", "").strip().lower() in {"true", "1", "yes", "on"}
+MIN_POOL_SIZE = 10
+
+
+def _worker_count() -> int:
+    """
+    uvicorn workers: WEB_CONCURRENCY if set, else one per CPU this process
+    may run on. Every worker opens its own Mongo pool (MIN_POOL_SIZE up to
+    maxPoolSize connections), so set WEB_CONCURRENCY under container CPU quotas,
+    which none of the CPU counts below take into account.
+    """
+    configured = os.environ.get("WEB_CONCURRENCY", "").strip()
+    if configured:
+        return max(1, int(configured))
+    if hasattr(os, "process_cpu_count"):  # Python 3.13+
+        count = os.process_cpu_count()
+    elif hasattr(os, "sched_getaffinity"):
+        count = len(os.sched_getaffinity(0))
+    else:
+        count = os.cpu_count()
+    return count or 2
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup:
     logger.info("Connecting to MongoDB: %s", MONGODB_URI)
-    client = AsyncIOMotorClient(MONGODB_URI)
+    client = AsyncIOMotorClient(
+        MONGODB_URI,
+        maxPoolSize=50,
+        minPoolSize=MIN_POOL_SIZE,
+        maxIdleTimeMS=60000,
+        serverSelectionTimeoutMS=3000,
+        connectTimeoutMS=3000,
+        compressors="zstd,zlib",
+        uuidRepresentation="standard",
+    )
     database = client.get_default_database()
 
-    # Ensure the database is available:
-    pong = await database.command("ping")
-    if int(pong.get("ok", 0)) != 1:
+    # Ensure the database is available, pinging concurrently so the pool
+    # opens its connections before the first request arrives:
+    pongs = await asyncio.gather(*(database.command("ping") for _ in range(MIN_POOL_SIZE)))
+    if any(int(pong.get("ok", 0)) != 1 for pong in pongs):
         raise Exception("Cluster connection is not okay")
     
+    # Build the OpenAPI schema now rather than on the first /docs request:
+    app.openapi()
+
     todo_list = database.get_collection(COLLECTION_NAME)
+    # name backs the sorted list endpoint; item updates match on _id only
+    await todo_list.create_index([("name", 1)])
     app.todo_dal = ToDoDAL(todo_list)
 
     # Yield back to FastAPI application:
@@ -42,18 +80,56 @@ async def lifespan(app: FastAPI):
     client.close()
     logger.info("MongoDB connection closed")
 
-app = FastAPI(lifespan=lifespan, debug=DEBUG)
-
-
-@app.get("/api/lists", response_model=list[ListSummary])
-async def get_all_lists() -> list[ListSummary]:
+app = FastAPI(lifespan=lifespan, debug=DEBUG, default_response_class=ORJSONResponse)
+
+
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+
+
+def _to_oid(list_id: str) -> ObjectId:
+    """
+    Parse a list id from the URL once; the DAL only deals in ObjectIds.
+    The shape check avoids raising InvalidId just to reject bad input.
+    """
+    if len(list_id) == 24 and _HEX_DIGITS.issuperset(list_id):
+        return ObjectId(list_id)
+    raise HTTPException(status_code=400, detail="Invalid list id")
+
+
+def model_response(
+    content,
+    status_code: int = status.HTTP_200_OK,
+    headers: dict[str, str] | None = None,
+) -> ORJSONResponse:
+    """
+    Serialize already-built models straight to JSON.
+    Routes using this set response_model=None so FastAPI does not re-validate
+    the models; the schema is still published through `responses=`.
+    """
+    if isinstance(content, list):
+        body = [m.model_dump() for m in content]
+    else:
+        body = content.model_dump()
+    return ORJSONResponse(content=body, status_code=status_code, headers=headers)
+
+
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception) -> ORJSONResponse:
+    # Production only: with DEBUG on, Starlette's ServerErrorMiddleware skips
+    # this handler and returns a plain-text traceback instead. Starlette
+    # re-raises after the handler runs, so uvicorn logs the traceback; this
+    # handler must not log it a second time.
+    return ORJSONResponse(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={"detail": "Internal server error"},
+    )
+
+
+@app.get("/api/lists", response_model=None, responses={200: {"model": list[ListSummary]}})
+async def get_all_lists() -> ORJSONResponse:
     logger.info("Fetching all todo lists")
-    try:
-        lists = [i async for i in app.todo_dal.list_todo_lists()]
-        return lists
-    except Exception as exc:
-        logger.exception("Error listing todo lists")
-        raise HTTPException(status_code=500, detail="Failed to list todo lists")
+    lists = await app.todo_dal.list_todo_lists()
+    return model_response(lists)
 
 
 class NewList(BaseModel):
@@ -65,42 +141,68 @@ class NewListResponse(BaseModel):
     name: str
 
 
-@app.post("/api/lists", status_code=status.HTTP_201_CREATED, response_model=NewListResponse)
-async def create_todo_list(new_list: NewList) -> NewListResponse:
-    try:
-        list_id = await app.todo_dal.create_todo_list(new_list.name)
-        return NewListResponse(id=list_id, name=new_list.name)
-    except Exception as exc:
-        logger.exception("Error creating todo list")
-        raise HTTPException(status_code=500, detail="Failed to create todo list")
-
-
-@app.get("/api/lists/{list_id}", response_model=ToDoList)
-async def get_list(list_id: str) -> ToDoList:
-    try:
-        todo = await app.todo_dal.get_todo_list(list_id)
-        if todo is None:
+@app.post(
+    "/api/lists",
+    status_code=status.HTTP_201_CREATED,
+    response_model=None,
+    responses={201: {"model": NewListResponse}},
+)
+async def create_todo_list(new_list: NewList) -> ORJSONResponse:
+    list_id = await app.todo_dal.create_todo_list(new_list.name)
+    return model_response(
+        NewListResponse.model_construct(id=list_id, name=new_list.name),
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+def _parse_if_none_match(value: str | None) -> set[str]:
+    """
+    Entity tags from an If-None-Match header, with weak W/ prefixes
+    stripped (nginx's gzip filter weakens our strong ETags); "*" is kept.
+    """
+    if not value:
+        return set()
+    tags = set()
+    for tag in value.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag:
+            tags.add(tag)
+    return tags
+
+
+def _list_headers(version: int) -> dict[str, str]:
+    return {"ETag": f'"{version}"', "Cache-Control": "no-cache"}
+
+
+@app.get("/api/lists/{list_id}", response_model=None, responses={200: {"model": ToDoList}})
+async def get_list(list_id: str, request: Request) -> Response:
+    list_oid = _to_oid(list_id)
+    if_none_match = _parse_if_none_match(request.headers.get("if-none-match"))
+    version = None
+    if if_none_match:
+        # conditional GET: decide the 304 from "_v" alone, before any full fetch
+        version = await app.todo_dal.get_todo_list_version(list_oid)
+        if version is None:
             raise HTTPException(status_code=404, detail="List not found")
-        return todo
-    except HTTPException:
-        raise
-    except Exception as exc:
-        logger.exception("Error retrieving list %s", list_id)
-        raise HTTPException(status_code=500, detail="Failed to get list")
+        headers = _list_headers(version)
+        if "*" in if_none_match or headers["ETag"] in if_none_match:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    found = await app.todo_dal.get_todo_list_versioned(list_oid, version=version)
+    if found is None:
+        raise HTTPException(status_code=404, detail="List not found")
+    version, todo = found
+    return model_response(todo, headers=_list_headers(version))
 
 
 @app.delete("/api/lists/{list_id}", response_model=bool)
 async def delete_list(list_id: str) -> bool:
-    try:
-        ok = await app.todo_dal.delete_todo_list(list_id)
-        if not ok:
-            raise HTTPException(status_code=404, detail="List not found")
-        return True
-    except HTTPException:
-        raise
-    except Exception as exc:
-        logger.exception("Error deleting list %s", list_id)
-        raise HTTPException(status_code=500, detail="Failed to delete list")
+    ok = await app.todo_dal.delete_todo_list(_to_oid(list_id))
+    if not ok:
+        raise HTTPException(status_code=404, detail="List not found")
+    return True
 
 
 class NewItem(BaseModel):
@@ -110,50 +212,50 @@ class NewItemResponse(BaseModel):
     id: str
     label: str
 
-@app.post("/api/lists/{list_id}/items", status_code=status.HTTP_201_CREATED, response_model=ToDoList)
-async def create_item(list_id: str, new_item: NewItem) -> ToDoList:
-    try:
-        result = await app.todo_dal.create_item(list_id, new_item.label)
-        if result is None:
-            raise HTTPException(status_code=404, detail="List not found")
-        return result
-    except HTTPException:
-        raise
-    except Exception as exc:
-        logger.exception("Error creating item in list %s", list_id)
-        raise HTTPException(status_code=500, detail="Failed to create item")
-
-
-@app.delete("/api/lists/{list_id}/items/{item_id}", response_model=ToDoList)
-async def delete_item(list_id: str, item_id: str) -> ToDoList:
-    try:
-        result = await app.todo_dal.delete_item(list_id, item_id)
-        if result is None:
-            raise HTTPException(status_code=404, detail="List or item not found")
-        return result
-    except HTTPException:
-        raise
-    except Exception as exc:
-        logger.exception("Error deleting item %s from list %s", item_id, list_id)
-        raise HTTPException(status_code=500, detail="Failed to delete item")
+@app.post(
+    "/api/lists/{list_id}/items",
+    status_code=status.HTTP_201_CREATED,
+    response_model=None,
+    responses={201: {"model": NewItemResponse}},
+)
+async def create_item(list_id: str, new_item: NewItem) -> ORJSONResponse:
+    item = await app.todo_dal.create_item(_to_oid(list_id), new_item.label)
+    if item is None:
+        raise HTTPException(status_code=404, detail="List not found")
+    return model_response(
+        NewItemResponse.model_construct(id=item.id, label=item.label),
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+@app.delete("/api/lists/{list_id}/items/{item_id}", response_model=bool)
+async def delete_item(list_id: str, item_id: UUID) -> bool:
+    list_found, removed = await app.todo_dal.delete_item(_to_oid(list_id), item_id)
+    if not list_found:
+        raise HTTPException(status_code=404, detail="List not found")
+    if not removed:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return True
 
 
 class ToDoItemUpdate(BaseModel):
-    item_id: str
+    item_id: UUID
     checked_state: bool
 
-@app.patch("/api/lists/{list_id}/items/checked_state", response_model=ToDoList)
-async def set_checked_state(list_id: str, update: ToDoItemUpdate) -> ToDoList:
-    try:
-        result = await app.todo_dal.set_checked_state(list_id, update.item_id, update.checked_state)
-        if result is None:
-            raise HTTPException(status_code=404, detail="List or item not found")
-        return result
-    except HTTPException:
-        raise
-    except Exception as exc:
-        logger.exception("Error updating checked state for item %s in list %s", update.item_id, list_id)
-        raise HTTPException(status_code=500, detail="Failed to update checked state")
+@app.patch(
+    "/api/lists/{list_id}/items/checked_state",
+    response_model=None,
+    responses={200: {"model": ToDoListItem}},
+)
+async def set_checked_state(list_id: str, update: ToDoItemUpdate) -> ORJSONResponse:
+    list_found, item = await app.todo_dal.set_checked_state(
+        _to_oid(list_id), update.item_id, update.checked_state
+    )
+    if not list_found:
+        raise HTTPException(status_code=404, detail="List not found")
+    if item is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return model_response(item)
 
 
 class DummyResponse(BaseModel):
@@ -161,14 +263,25 @@ class DummyResponse(BaseModel):
     when: datetime
 
 
-@app.get("/api/dummy", response_model=DummyResponse)
-async def get_dummy() -> DummyResponse:
-    return DummyResponse(id=str(ObjectId()), when=datetime.now())
+@app.get("/api/dummy", response_model=None, responses={200: {"model": DummyResponse}})
+async def get_dummy() -> ORJSONResponse:
+    return model_response(
+        DummyResponse.model_construct(id=str(ObjectId()), when=datetime.now(timezone.utc))
+    )
 
 
 def main(argv=sys.argv[1:]):
     try:
-        uvicorn.run("server:app", host="0.0.0.0", port=3001, reload=DEBUG)
+        uvicorn.run(
+            "server:app",
+            host="0.0.0.0",
+            port=3001,
+            loop="uvloop",
+            http="httptools",
+            # reload only supports a single worker
+            workers=1 if DEBUG else _worker_count(),
+            reload=DEBUG,
+        )
     except KeyboardInterrupt:
         pass
 
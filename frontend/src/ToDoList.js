@@ -34,7 +34,12 @@ function ToDoList({ listId, handleBackButton }) {
     setUpdating(true);
     try {
       const response = await axios.post(`/api/lists/${listId}/items`, { label: value });
-      setListData(response.data);
+      // server returns only the new item: append it locally
+      const created = { ...response.data, checked: false };
+      setListData((prev) => ({
+        ...prev,
+        items: [...(Array.isArray(prev?.items) ? prev.items : []), created],
+      }));
       setNewLabel("");
     } catch (err) {
       console.error("Failed to create item:", err);
@@ -52,9 +57,7 @@ function ToDoList({ listId, handleBackButton }) {
     setListData({ ...prev, items: newItemsOptimistic });
     setUpdating(true);
     try {
-      const response = await axios.delete(`/api/lists/${listData.id}/items/${id}`);
-      // server returns authoritative list
-      if (response?.data) setListData(response.data);
+      await axios.delete(`/api/lists/${listData.id}/items/${id}`);
     } catch (err) {
       console.error("Failed to delete item:", err);
       // rollback: restore previous list (or refetch)
@@ -80,7 +83,16 @@ function ToDoList({ listId, handleBackButton }) {
         item_id: itemId,
         checked_state: newState,
       });
-      if (response?.data) setListData(response.data);
+      // server returns the updated item: merge it into the list
+      const updated = response?.data;
+      if (updated?.id) {
+        setListData((cur) => ({
+          ...cur,
+          items: (Array.isArray(cur?.items) ? cur.items : []).map((it) =>
+            ((it.id || it._id || "") === updated.id) ? { ...it, ...updated } : it
+          ),
+        }));
+      }
     } catch (err) {
       console.error("Failed to update item state:", err);
       // rollback on failure